@@ -1,138 +1,233 @@
-from typing import List, Optional, Union, Set
-from enum import Enum
+from typing import List, Optional, Union, Set, Sequence, Tuple
+from enum import IntEnum
+from functools import lru_cache
 from abc import ABC, abstractmethod
-from tabulate import tabulate
+import re
+from itertools import count
+from weakref import WeakValueDictionary
 
 
 # Can structure a proof as a list of lists.
 
+# Expressions are hash-consed: constructing an expression that is structurally equal to a live one returns the live
+# object, so equality is identity. Keys are (cls, *fields) with child expressions keyed by id(); a parent holds its
+# children, so those ids stay valid for as long as the parent's entry exists.
+_interned = WeakValueDictionary()
+_uids = count()
+
+# Node kinds. Every concrete Expression class has one as its KIND, so the proof checker can dispatch on a node's type
+# with an int compare instead of isinstance.
+KIND_ATOM = 0
+KIND_NOT = 1
+KIND_AND = 2
+KIND_OR = 3
+KIND_IMP = 4
+KIND_CONTR = 5
+
 
 class Expression(ABC):
-    def __init__(self):
-        pass
+    # __weakref__ is needed for the interning table.
+    __slots__ = ("_uid", "_str", "__weakref__")
+
+    def __new__(cls):
+        self = super().__new__(cls)
+        self._uid = next(_uids)
+        return self
 
-    @abstractmethod
     def __eq__(self, other):
-        raise NotImplementedError()
+        return self is other
+
+    def __ne__(self, other):
+        return self is not other
+
+    def __hash__(self):
+        return self._uid
+
+    # Expressions are immutable and interned, so a copy is the expression itself. Pickling goes through __reduce__,
+    # which each node type defines so that unpickling rebuilds through the interning table.
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     @abstractmethod
     def __str__(self):
         raise NotImplementedError()
 
 
+CONTR_SYMBOL = "⊥"
+
+
 class Atom(Expression):
-    def __init__(self, name: str):
-        super().__init__()
-        self.name = name
+    __slots__ = ("name",)
+    KIND = KIND_ATOM
+
+    def __new__(cls, name: str):
+        # An atom named ⊥ is the contradiction, so that it is interned as the same object as Contr().
+        if cls is Atom and name == CONTR_SYMBOL:
+            return CONTR
+        key = (cls, name)
+        self = _interned.get(key)
+        if self is None:
+            self = super().__new__(cls)
+            self.name = name
+            self._str = name
+            _interned[key] = self
+        return self
+
+    def __reduce__(self):
+        return Atom, (self.name,)
 
     def __str__(self):
-        return self.name
-
-    def __eq__(self, other):
-        return isinstance(other, Atom) and self.name == other.name
+        return self._str
 
 
 class Contr(Atom):
-    def __init__(self):
-        super().__init__("⊥")
+    __slots__ = ()
+    KIND = KIND_CONTR
+
+    def __new__(cls):
+        return super().__new__(cls, CONTR_SYMBOL)
+
+    def __reduce__(self):
+        return Contr, ()
 
-    def __eq__(self, other):
-        return isinstance(other, Contr)
+
+# Keeps the interned contradiction alive, so every Contr() is this object.
+CONTR = Contr()
 
 
 class OperatorExpr(Expression, ABC):
-    def __init__(self, symbol: str, priority: int):
-        super().__init__()
-        self.symbol = symbol
-        self.priority = priority
+    # Subclasses set symbol and priority as class attributes; they are the same for every instance.
+    __slots__ = ()
+    symbol: str
+    priority: int
 
+    def _operand_str(self, operand: Expression) -> str:
+        if isinstance(operand, OperatorExpr) and operand.priority < self.priority:
+            return f"({operand})"
+        return str(operand)
 
-class NotExpr(OperatorExpr):
-    def __init__(self, content: Expression):
-        super().__init__("~", 60)
-        self.content = content
 
-    def __eq__(self, other):
-        return isinstance(other, NotExpr) and self.content == other.content
+class NotExpr(OperatorExpr):
+    __slots__ = ("content",)
+    KIND = KIND_NOT
+    symbol = "~"
+    priority = 60
+    _arity = 1
+
+    def __new__(cls, content: Expression):
+        key = (cls, id(content))
+        self = _interned.get(key)
+        if self is None:
+            self = super().__new__(cls)
+            self.content = content
+            self._str = None
+            _interned[key] = self
+        return self
+
+    def __reduce__(self):
+        return NotExpr, (self.content,)
 
     def __str__(self):
-        if isinstance(self.content, OperatorExpr) and self.content.priority < self.priority:
-            inside = f"({self.content})"
-        else:
-            inside = self.content
-        return f"~{inside}"
+        if self._str is None:
+            self._str = f"~{self._operand_str(self.content)}"
+        return self._str
 
 
 class BinaryExpr(OperatorExpr, ABC):
-    def __init__(self, left: Expression, right: Expression, symbol: str, priority: int):
-        super().__init__(symbol, priority)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return isinstance(self, other.__class__) and self.left == other.left and self.right == other.right
+    __slots__ = ("left", "right")
+    _arity = 2
+
+    def __new__(cls, left: Expression, right: Expression):
+        key = (cls, id(left), id(right))
+        self = _interned.get(key)
+        if self is None:
+            self = super().__new__(cls)
+            self.left = left
+            self.right = right
+            self._str = None
+            _interned[key] = self
+        return self
+
+    def __reduce__(self):
+        return type(self), (self.left, self.right)
 
     def __str__(self):
-        if isinstance(self.left, OperatorExpr) and self.left.priority < self.priority:
-            left = f"({self.left})"
-        else:
-            left = self.left
-
-        if isinstance(self.right, OperatorExpr) and self.right.priority < self.priority:
-            right = f"({self.right})"
-        else:
-            right = self.right
-
-        return f"{left} {self.symbol} {right}"
+        if self._str is None:
+            self._str = f"{self._operand_str(self.left)} {self.symbol} {self._operand_str(self.right)}"
+        return self._str
 
 
 class OrExpr(BinaryExpr):
-    def __init__(self, left: Expression, right: Expression):
-        super().__init__(left, right, "v", 20)
+    __slots__ = ()
+    KIND = KIND_OR
+    symbol = "v"
+    priority = 20
 
 
 class AndExpr(BinaryExpr):
-    def __init__(self, left: Expression, right: Expression):
-        super().__init__(left, right, "^", 50)
+    __slots__ = ()
+    KIND = KIND_AND
+    symbol = "^"
+    priority = 50
 
 
 class ImpExpr(BinaryExpr):
-    def __init__(self, left: Expression, right: Expression):
-        super().__init__(left, right, "→", 5)
+    __slots__ = ()
+    KIND = KIND_IMP
+    symbol = "→"
+    priority = 5
+
+
+# Stored in Reference.discharge for a vacuous discharge, so the checks can test discharge < 0 instead of comparing
+# against "v".
+VACUOUS = -1
 
 
 class Reference:
+    __slots__ = ("line_no", "discharge", "_str")
+
     def __init__(self, line_no: int, discharge: Optional[Union[int, str]]=None):
         """
 
         :param line_no: The line number
         :param discharge: The assumption to discharge by index.
-                          Can also be None for no discharge, or "v" for vacuous discharge.
+                          Can also be None for no discharge, or "v" (stored as VACUOUS) for vacuous discharge.
         """
+        if discharge == "v":
+            discharge = VACUOUS
+        elif discharge is not None and discharge < 0 and discharge != VACUOUS:
+            raise ValueError(f"Invalid discharge {discharge}")
         self.line_no = line_no
         self.discharge = discharge
+        self._str = None
 
     def __str__(self):
-        discharge = ""
-        if self.discharge == "v":
-            discharge = "[]"
-        elif self.discharge is not None:
-            discharge = f"[{self.discharge}]"
-        return f"{self.line_no}{discharge}"
+        if self._str is None:
+            discharge = ""
+            if self.discharge == VACUOUS:
+                discharge = "[]"
+            elif self.discharge is not None:
+                discharge = f"[{self.discharge}]"
+            self._str = f"{self.line_no}{discharge}"
+        return self._str
 
 
-class References(list):
-    def __init__(self, *args):
-        super().__init__()
-        for x in args:
-            self.append(x)
+def References(*args: Reference) -> Tuple[Reference, ...]:
+    return args
 
-    def __str__(self):
-        xs = [str(x) for x in self]
-        return ", ".join(xs)
 
+def _refs_str(references: Sequence[Reference]) -> str:
+    return ", ".join([str(x) for x in references])
 
-class Rule(Enum):
+
+# Printed names of the rules, indexed by Rule.
+_RULE_STR = ("A", "^E", "^I", "~~E", "~E", "~I", "vI", "vE", "→I", "→E", "RAA")
+
+
+class Rule(IntEnum):
     ASSUMPTION = 0
     AND_ELIM = 1
     AND_INTRO = 2
@@ -146,36 +241,48 @@ class Rule(Enum):
     RAA = 10 # Reducto Ad Absurdum
 
     def __str__(self):
-        outs = [
-            "A",
-            "^E",
-            "^I",
-            "~~E",
-            "~E",
-            "~I",
-            "vI",
-            "vE",
-            "→I",
-            "→E",
-            "RAA"
-        ]
-        return outs[self.value]
+        return self._str
+
+
+for _rule in Rule:
+    _rule._str = _RULE_STR[_rule]
+del _rule
+
+
+# Assumption sets are stored as bitmasks: assumption i is in the set iff bit i is set.
+def to_mask(assumptions: Union[Set[int], int]) -> int:
+    if isinstance(assumptions, int):
+        return assumptions
+    mask = 0
+    for i in assumptions:
+        mask |= 1 << i
+    return mask
+
+
+def mask_to_set(mask: int) -> Set[int]:
+    return {i for i in range(mask.bit_length()) if mask >> i & 1}
 
 
 class ProofLine:
-    def __init__(self, assumptions: Set[int], content: Expression, references: References, rule_used: Rule):
-        self.assumptions = assumptions
+    __slots__ = ("assumptions", "content", "references", "rule_used")
+
+    def __init__(self, assumptions: Union[Set[int], int], content: Expression, references: Sequence[Reference],
+                 rule_used: Rule):
+        self.assumptions = to_mask(assumptions)
         self.content = content
-        self.references = references
+        # Tuples, which is what References builds, are kept as is; other sequences are copied into a tuple.
+        self.references = references if isinstance(references, tuple) else tuple(references)
         self.rule_used = rule_used
 
     def to_repr_list(self):
-        return [self.assumptions, self.content, self.references, self.rule_used]
+        return [mask_to_set(self.assumptions), self.content, _refs_str(self.references), str(self.rule_used)]
 
 
 class Goal:
-    def __init__(self, assumptions: Set[int], assumption_map: List[Expression], content: Expression):
-        self.assumptions = assumptions
+    __slots__ = ("assumptions", "assumption_map", "content")
+
+    def __init__(self, assumptions: Union[Set[int], int], assumption_map: List[Expression], content: Expression):
+        self.assumptions = to_mask(assumptions)
         self.assumption_map = assumption_map
         self.content = content
 
@@ -184,24 +291,29 @@ class Goal:
 
 
 class Proof:
+    # Line shape required by each rule, indexed by Rule: (number of references, bitmask of references that must
+    # discharge an assumption, bitmask of references that must not, KIND the line's content must have or None).
+    # Bit i refers to the i-th reference. The _check_* methods below assume this holds, so they are only reached
+    # through can_add_line or the can_add_* methods, which check it first.
+    _RULE_PREFLIGHT = (
+        (0, 0b000, 0b000, None),       # ASSUMPTION
+        (1, 0b000, 0b001, None),       # AND_ELIM
+        (2, 0b000, 0b011, KIND_AND),   # AND_INTRO
+        (1, 0b000, 0b001, None),       # DNE
+        (2, 0b000, 0b011, KIND_CONTR), # NOT_ELIM
+        (1, 0b001, 0b000, KIND_NOT),   # NOT_INTRO
+        (1, 0b000, 0b001, KIND_OR),    # OR_INTRO
+        (3, 0b110, 0b001, None),       # OR_ELIM
+        (1, 0b001, 0b000, KIND_IMP),   # IMPLIES_INTRO
+        (2, 0b000, 0b011, None),       # IMPLIES_ELIM
+        (2, 0b010, 0b001, KIND_NOT),   # RAA
+    )
+
     def __init__(self, premises: List[Expression], goal: Expression):
         # Everything in self.lines is assumed to be a correctly added line.
-        self.lines = [ProofLine({i}, premises[i], References(), Rule.ASSUMPTION) for i in range(len(premises))]
+        self.lines = [ProofLine(1 << i, premises[i], References(), Rule.ASSUMPTION) for i in range(len(premises))]
         self.assumption_map = [x for x in premises] # make a copy of the original premises.
-        self.goal = Goal(set(range(len(self.lines))), premises, goal)
-        self.can_add_funcs = [
-            self.can_add_assumption,
-            self.can_add_and_elim,
-            self.can_add_and_intro,
-            self.can_add_dne,
-            self.can_add_not_elim,
-            self.can_add_not_intro,
-            self.can_add_or_intro,
-            self.can_add_or_elim,
-            self.can_add_implies_intro,
-            self.can_add_implies_elim,
-            self.can_add_raa
-        ]
+        self.goal = Goal((1 << len(self.lines)) - 1, premises, goal)
 
     def is_complete(self):
         # Nothing has been done yet.
@@ -209,15 +321,15 @@ class Proof:
 
         # Check if the last line has matching assumptions and content.
         last_line = self.lines[-1]
-        return last_line.content == self.goal.content and last_line.assumptions == self.goal.assumptions
+        return last_line.content is self.goal.content and last_line.assumptions == self.goal.assumptions
 
     def try_add_line(self, line: ProofLine) -> bool:
-        if self.can_add_line(line):
-            if line.rule_used == Rule.ASSUMPTION:
-                self.assumption_map.append(line.content)
-            self.lines.append(line)
-            return True
-        return False
+        if not self.can_add_line(line): return False
+
+        if line.rule_used == Rule.ASSUMPTION:
+            self.assumption_map.append(line.content)
+        self.lines.append(line)
+        return True
 
     def can_add_line(self, line: ProofLine) -> bool:
         """
@@ -225,221 +337,252 @@ class Proof:
         :param line: The line to check.
         :return: True, if the line can be added, and False otherwise.
         """
-        return self.can_add_funcs[line.rule_used.value](line)
+        rule = line.rule_used
+        return self._passes_preflight(rule, line) and Proof._CAN_ADD[rule](self, line)
 
-    def can_add_assumption(self, line: ProofLine):
-        correct_assumptions = len(line.assumptions) == 1 and list(line.assumptions)[0] == len(self.assumption_map)
-        if not correct_assumptions: return False
+    def can_add_assumption(self, line: ProofLine) -> bool:
+        return self._passes_preflight(Rule.ASSUMPTION, line) and self._check_assumption(line)
 
-        return len(line.references) == 0
+    def can_add_and_elim(self, line: ProofLine) -> bool:
+        return self._passes_preflight(Rule.AND_ELIM, line) and self._check_and_elim(line)
 
-    def can_add_and_elim(self, line: ProofLine):
-        correct_references = len(line.references) == 1 and line.references[0].discharge is None
-        if not correct_references: return False
+    def can_add_and_intro(self, line: ProofLine) -> bool:
+        return self._passes_preflight(Rule.AND_INTRO, line) and self._check_and_intro(line)
 
-        reference = line.references[0].line_no
-        correct_assumptions = line.assumptions == self.lines[reference].assumptions
-        if not correct_assumptions: return False
+    def can_add_dne(self, line: ProofLine) -> bool:
+        return self._passes_preflight(Rule.DNE, line) and self._check_dne(line)
 
-        referenced = self.lines[reference].content
-        if not isinstance(referenced, AndExpr): return False
+    def can_add_not_elim(self, line: ProofLine) -> bool:
+        return self._passes_preflight(Rule.NOT_ELIM, line) and self._check_not_elim(line)
 
-        left_or_right_match = line.content == referenced.left or line.content == referenced.right
-        return left_or_right_match
+    def can_add_not_intro(self, line: ProofLine) -> bool:
+        return self._passes_preflight(Rule.NOT_INTRO, line) and self._check_not_intro(line)
 
-    def can_add_and_intro(self, line: ProofLine):
-        if not isinstance(line.content, AndExpr): return False
+    def can_add_or_intro(self, line: ProofLine) -> bool:
+        return self._passes_preflight(Rule.OR_INTRO, line) and self._check_or_intro(line)
 
-        correct_references = (len(line.references) == 2
-                              and all([reference.discharge is None for reference in line.references]))
-        if not correct_references: return False
+    def can_add_or_elim(self, line: ProofLine) -> bool:
+        return self._passes_preflight(Rule.OR_ELIM, line) and self._check_or_elim(line)
 
-        reference1 = line.references[0]
-        reference2 = line.references[1]
-        correct_assumptions = (line.assumptions ==
-                               self.lines[reference1.line_no].assumptions.union(
-                                   self.lines[reference2.line_no].assumptions))
+    def can_add_implies_intro(self, line: ProofLine) -> bool:
+        return self._passes_preflight(Rule.IMPLIES_INTRO, line) and self._check_implies_intro(line)
+
+    def can_add_implies_elim(self, line: ProofLine) -> bool:
+        return self._passes_preflight(Rule.IMPLIES_ELIM, line) and self._check_implies_elim(line)
+
+    def can_add_raa(self, line: ProofLine) -> bool:
+        return self._passes_preflight(Rule.RAA, line) and self._check_raa(line)
+
+    def _passes_preflight(self, rule: Rule, line: ProofLine) -> bool:
+        n_references, required, forbidden, kind = Proof._RULE_PREFLIGHT[rule]
+        if kind is not None and line.content.KIND != kind: return False
+        if len(line.references) != n_references: return False
+
+        bit = 1
+        for reference in line.references:
+            if reference.discharge is None:
+                if required & bit: return False
+            elif forbidden & bit: return False
+            bit <<= 1
+        return True
+
+    def _check_assumption(self, line: ProofLine):
+        return line.assumptions == 1 << len(self.assumption_map)
+
+    def _check_and_elim(self, line: ProofLine):
+        ref_line = self.lines[line.references[0].line_no]
+        correct_assumptions = line.assumptions == ref_line.assumptions
         if not correct_assumptions: return False
 
-        referenced_content1 = self.lines[reference1.line_no].content
-        referenced_content2 = self.lines[reference2.line_no].content
-        left_and_right_match = line.content.left == referenced_content1 and line.content.right == referenced_content2
-        return left_and_right_match
+        referenced = ref_line.content
+        if referenced.KIND != KIND_AND: return False
+
+        line_content = line.content
+        left_or_right_match = line_content is referenced.left or line_content is referenced.right
+        return left_or_right_match
+
+    def _check_and_intro(self, line: ProofLine):
+        lines = self.lines
+        ref_line1 = lines[line.references[0].line_no]
+        ref_line2 = lines[line.references[1].line_no]
+        correct_assumptions = line.assumptions == ref_line1.assumptions | ref_line2.assumptions
+        if not correct_assumptions: return False
 
-    def can_add_dne(self, line: ProofLine):
-        correct_references = len(line.references) == 1 and line.references[0].discharge is None
-        if not correct_references: return False
+        line_content = line.content
+        left_and_right_match = line_content.left is ref_line1.content and line_content.right is ref_line2.content
+        return left_and_right_match
 
-        reference = line.references[0].line_no
-        referenced = self.lines[reference]
+    def _check_dne(self, line: ProofLine):
+        referenced = self.lines[line.references[0].line_no]
         correct_assumptions = line.assumptions == referenced.assumptions
         if not correct_assumptions: return False
 
         referenced_content = referenced.content
-        if not isinstance(referenced_content, NotExpr): return False
+        if referenced_content.KIND != KIND_NOT: return False
 
         referenced_content_content = referenced_content.content
-        if not isinstance(referenced_content_content, NotExpr): return False
-
-        return referenced_content_content.content == line.content
+        if referenced_content_content.KIND != KIND_NOT: return False
 
-    def can_add_not_elim(self, line: ProofLine):
-        correct_references = (len(line.references) == 2
-                              and all([line.references[i].discharge is None for i in range(2)]))
-        if not correct_references: return False
+        return referenced_content_content.content is line.content
 
-        reference1 = self.lines[line.references[0].line_no]
-        reference2 = self.lines[line.references[1].line_no]
-        correct_assumptions = line.assumptions == reference1.assumptions.union(reference2.assumptions)
+    def _check_not_elim(self, line: ProofLine):
+        lines = self.lines
+        reference1 = lines[line.references[0].line_no]
+        reference2 = lines[line.references[1].line_no]
+        correct_assumptions = line.assumptions == reference1.assumptions | reference2.assumptions
         if not correct_assumptions: return False
 
         referenced1 = reference1.content
         referenced2 = reference2.content
-        correct_contents = (((isinstance(referenced1, NotExpr) and referenced1.content == referenced2)
-                            or (isinstance(referenced2, NotExpr) and referenced1 == referenced2.content))
-                            and line.content == Contr())
+        correct_contents = ((referenced1.KIND == KIND_NOT and referenced1.content is referenced2)
+                            or (referenced2.KIND == KIND_NOT and referenced1 is referenced2.content))
         return correct_contents
 
-    def can_add_not_intro(self, line: ProofLine):
-        if len(line.references) != 1: return False
+    def _check_not_intro(self, line: ProofLine):
         line_reference = line.references[0]
-        if line_reference.discharge is None: return False
-
         referenced = self.lines[line_reference.line_no]
-        if referenced.content != Contr(): return False
+        if referenced.content is not CONTR: return False
 
-        if line_reference.discharge == "v":
-            correct_assumptions = line.assumptions == referenced.assumptions
-        else:
-            correct_assumptions = (line.assumptions.union({line_reference.discharge}) == referenced.assumptions
-                                   and len(line.assumptions) < len(referenced.assumptions))
+        discharge = line_reference.discharge
+        line_assumptions = line.assumptions
+        if discharge < 0:
+            return line_assumptions == referenced.assumptions
 
+        # The discharged assumption must be in the referenced line's assumptions and not in this line's.
+        discharged = 1 << discharge
+        correct_assumptions = (line_assumptions | discharged == referenced.assumptions
+                               and not line_assumptions & discharged)
         if not correct_assumptions: return False
 
-        line_content = line.content
-        if not isinstance(line_content, NotExpr): return False
+        return line.content.content is self.assumption_map[discharge]
 
-        return ((line_reference.discharge != "v"
-                and line_content.content == self.assumption_map[line_reference.discharge])
-                or line_reference.discharge == "v")
-
-    def can_add_or_intro(self, line: ProofLine):
-        if not isinstance(line.content, OrExpr): return False
-
-        correct_references = len(line.references) == 1 and line.references[0].discharge is None
-        if not correct_references: return False
-
-        reference = line.references[0]
-        correct_assumptions = line.assumptions == self.lines[reference.line_no]
+    def _check_or_intro(self, line: ProofLine):
+        ref_line = self.lines[line.references[0].line_no]
+        correct_assumptions = line.assumptions == ref_line.assumptions
         if not correct_assumptions: return False
 
-        referenced_content = self.lines[reference.line_no].content
-        left_or_right_match = referenced_content == line.content.left or referenced_content == line.content.right
+        referenced_content = ref_line.content
+        line_content = line.content
+        left_or_right_match = referenced_content is line_content.left or referenced_content is line_content.right
         return left_or_right_match
 
-    def can_add_or_elim(self, line: ProofLine):
-        if len(line.references) != 3: return False
+    def _check_or_elim(self, line: ProofLine):
         ref1 = line.references[0]
         ref2 = line.references[1]
         ref3 = line.references[2]
 
-        if (ref1.discharge is not None or
-                ref2.discharge in [None, "v"] or
-                ref3.discharge in [None, "v"]): return False
-        referenced1 = self.lines[ref1.line_no]
-        referenced2 = self.lines[ref2.line_no]
-        referenced3 = self.lines[ref3.line_no]
+        if ref2.discharge < 0 or ref3.discharge < 0: return False
+        lines = self.lines
+        referenced1 = lines[ref1.line_no]
+        referenced2 = lines[ref2.line_no]
+        referenced3 = lines[ref3.line_no]
 
-        discharge_cont2 = self.assumption_map[ref2.discharge]
-        discharge_cont3 = self.assumption_map[ref3.discharge]
+        assumption_map = self.assumption_map
+        discharge_cont2 = assumption_map[ref2.discharge]
+        discharge_cont3 = assumption_map[ref3.discharge]
 
         referenced1_content = referenced1.content
-        if not isinstance(referenced1_content, OrExpr): return False
-        if (not (discharge_cont2 == referenced1_content.left and discharge_cont3 == referenced1_content.right)
-            and not (discharge_cont2 == referenced1_content.right and discharge_cont2 == referenced1_content.left)):
+        if referenced1_content.KIND != KIND_OR: return False
+        if (not (discharge_cont2 is referenced1_content.left and discharge_cont3 is referenced1_content.right)
+            and not (discharge_cont2 is referenced1_content.right and discharge_cont3 is referenced1_content.left)):
             return False
-        if not (referenced2.content == line.content and referenced3.content == line.content):
+        line_content = line.content
+        if not (referenced2.content is line_content and referenced3.content is line_content):
             return False
 
         if (line.assumptions !=
-            referenced1.assumptions.union(referenced2.assumptions).union(referenced3.assumptions)
-                - {ref2.discharge, ref3.discharge}):
+            (referenced1.assumptions | referenced2.assumptions | referenced3.assumptions)
+                & ~(1 << ref2.discharge | 1 << ref3.discharge)):
             return False
 
         return True
 
-    def can_add_implies_intro(self, line: ProofLine):
-        if len(line.references) != 1: return False
+    def _check_implies_intro(self, line: ProofLine):
         reference = line.references[0]
 
-        if reference.discharge is None: return False
-
         referenced = self.lines[reference.line_no]
         line_content = line.content
 
-        if not isinstance(line_content, ImpExpr): return False
-        if reference.discharge == "v":
+        discharge = reference.discharge
+        if discharge < 0:
             if line.assumptions != referenced.assumptions: return False
-            return line_content.right == referenced.content
-
-        if line.assumptions != referenced.assumptions - {reference.discharge}: return False
-        return (line_content.right == referenced.content and
-                line_content.left == self.assumption_map[reference.discharge])
-
-    def can_add_implies_elim(self, line: ProofLine):
-        correct_references = (len(line.references) == 2 and
-                              all([reference.discharge is None for reference in line.references]))
-
-        if not correct_references: return False
+            return line_content.right is referenced.content
 
-        reference1 = line.references[0].line_no
-        reference2 = line.references[1].line_no
+        if line.assumptions != referenced.assumptions & ~(1 << discharge): return False
+        return (line_content.right is referenced.content and
+                line_content.left is self.assumption_map[discharge])
 
-        referenced1 = self.lines[reference1]
-        referenced2 = self.lines[reference2]
+    def _check_implies_elim(self, line: ProofLine):
+        lines = self.lines
+        referenced1 = lines[line.references[0].line_no]
+        referenced2 = lines[line.references[1].line_no]
 
-        correct_assumptions = line.assumptions == referenced1.assumptions.union(referenced2.assumptions)
+        correct_assumptions = line.assumptions == referenced1.assumptions | referenced2.assumptions
         if not correct_assumptions: return False
 
         content1 = referenced1.content
         content2 = referenced2.content
-        if isinstance(content1, ImpExpr):
+        if content1.KIND == KIND_IMP:
             imp_cont = content1
             other_cont = content2
-        elif isinstance(content2, ImpExpr):
+        elif content2.KIND == KIND_IMP:
             imp_cont = content2
             other_cont = content1
         else: return False
 
-        if imp_cont.left != other_cont: return False
-        return imp_cont.right == line.content
+        if imp_cont.left is not other_cont: return False
+        return imp_cont.right is line.content
 
-    def can_add_raa(self, line: ProofLine):
-        if len(line.references) != 2: return False
-        reference1 = line.references[0]
+    def _check_raa(self, line: ProofLine):
         reference2 = line.references[1]
 
-        if reference1.discharge is not None: return False
+        lines = self.lines
+        referenced1 = lines[line.references[0].line_no]
+        referenced2 = lines[reference2.line_no]
+        unioned_assumptions = referenced1.assumptions | referenced2.assumptions
 
-        referenced1 = self.lines[reference1.line_no]
-        referenced2 = self.lines[reference2.line_no]
-        line_content = line.content
-        unioned_assumptions = referenced1.assumptions.union(referenced2.assumptions)
-
-        if not isinstance(line_content, NotExpr): return False
-        if reference2.discharge == "v":
+        discharge = reference2.discharge
+        if discharge < 0:
             return line.assumptions == unioned_assumptions
 
-        if line.assumptions != unioned_assumptions - {reference2.discharge}: return False
-        return line_content.content == self.assumption_map[reference2.discharge]
+        if line.assumptions != unioned_assumptions & ~(1 << discharge): return False
+        return line.content.content is self.assumption_map[discharge]
 
     def __str__(self):
-        table = [line.to_repr_list() for line in self.lines]
-        return f"Goal: {self.goal}\n{str(tabulate(table, tablefmt='plain', showindex='always'))}"
+        # Plain table with two spaces between columns. Columns whose non-empty cells are all integers, such as the line
+        # index, are right-aligned; the others are left-aligned.
+        rows = [[str(i)] + [str(x) for x in line.to_repr_list()] for i, line in enumerate(self.lines)]
+        columns = list(zip(*rows))
+        widths = [max(len(cell) for cell in column) for column in columns]
+        numeric = [all(cell.isdigit() for cell in column if cell) for column in columns]
+        table = "\n".join("  ".join(cell.rjust(widths[c]) if numeric[c] else cell.ljust(widths[c])
+                                    for c, cell in enumerate(row)).rstrip()
+                          for row in rows)
+        return f"Goal: {self.goal}\n{table}"
+
+    # Per-rule checks, indexed by Rule; Rule is an IntEnum, so a rule indexes this tuple directly.
+    _CAN_ADD = (
+        _check_assumption,
+        _check_and_elim,
+        _check_and_intro,
+        _check_dne,
+        _check_not_elim,
+        _check_not_intro,
+        _check_or_intro,
+        _check_or_elim,
+        _check_implies_intro,
+        _check_implies_elim,
+        _check_raa
+    )
 
 
 BIN_OPS = {'→': 1, 'v': 2, '^': 3}
 UNI_OPS = {'~': 4}
+# Priority of every operator, 0 for anything else.
+_PRIORITY = {**BIN_OPS, **UNI_OPS}
+
+# Normalises input in one pass: both arrow spellings become →, and spaces are dropped.
+_NORMALISE = re.compile(r"-?->| ")
 
 
 def isOperator(x):
@@ -447,7 +590,7 @@ def isOperator(x):
 
 
 def isBinaryOperator(c):
-    return c in BIN_OPS.keys()
+    return c in BIN_OPS
 
 
 def isUnaryOperator(c):
@@ -457,9 +600,7 @@ def isUnaryOperator(c):
 # Function to find priority
 # of given operator.
 def getPriority(x):
-    if x in BIN_OPS: return BIN_OPS[x]
-    if x in UNI_OPS: return UNI_OPS[x]
-    return 0
+    return _PRIORITY.get(x, 0)
 
 
 def extractGroup(operators, operands):
@@ -484,9 +625,8 @@ def infixToPrefix(infix):
     # stack for operands.
     operands = []
 
-    i = 0
-    while i < len(infix):
-        cur = infix[i]
+    # After normalisation every token is a single character.
+    for cur in infix:
         if (cur == '('):
             operators.append(cur)
 
@@ -498,17 +638,16 @@ def infixToPrefix(infix):
             operators.pop()
 
         # If current character is an operand then push into operands stack.
-        elif not (isBinaryOperator(cur) or isUnaryOperator(cur)):
+        elif cur not in _PRIORITY:
             operands.append(cur)
         else:
-            if isBinaryOperator(cur):
-                while len(operators) > 0 and getPriority(cur) <= getPriority(operators[-1]):
+            if cur in BIN_OPS:
+                priority = _PRIORITY[cur]
+                while len(operators) > 0 and priority <= _PRIORITY.get(operators[-1], 0):
                     tmp = extractGroup(operators, operands)
                     operands.append(tmp)
             operators.append(cur)
 
-        i += 1
-
     while len(operators) > 0:
         tmp = extractGroup(operators, operands)
         operands.append(tmp)
@@ -537,12 +676,11 @@ symbolToCls = {
 }
 
 
+# Expressions are immutable and interned, so a cached result can be shared by every caller.
+@lru_cache(maxsize=1024)
 def parseExpr(expr: str) -> Optional[Expression]:
     if not expr: return None
-    expr = (expr
-            .replace("-->", "→")
-            .replace("->", "→")
-            .replace(" ", ""))
+    expr = _NORMALISE.sub(lambda m: "" if m.group() == " " else "→", expr)
     prefix_expr = infixToPrefix(expr)
 
     stack = []
@@ -560,14 +698,10 @@ def parseExpr(expr: str) -> Optional[Expression]:
             if isinstance(operator, Atom):
                 break
 
-            if BinaryExpr in operator.__mro__ and len(last) == 3:
-                stack.pop()
-                compiled = operator(last[1], last[2])
-            elif NotExpr in operator.__mro__ and len(last) == 2:
-                stack.pop()
-                compiled = operator(last[1])
-            else:
+            if len(last) < operator._arity + 1:
                 break
+            stack.pop()
+            compiled = operator(*last[1:])
 
             if stack:
                 stack[-1].append(compiled)
@@ -1,5 +1,8 @@
+import copy
+import pickle
 import unittest
-from parser import Proof, ProofLine, Atom, AndExpr, Reference, Rule, OrExpr, NotExpr, Contr, ImpExpr, References
+from parser import (Proof, ProofLine, Atom, AndExpr, Reference, Rule, OrExpr, NotExpr, Contr, ImpExpr, References,
+                    parseExpr, VACUOUS)
 
 
 class CanAddTests(unittest.TestCase):
@@ -169,7 +172,151 @@ class CanAddTests(unittest.TestCase):
             self.assertTrue(pf.try_add_line(pl))
         self.assertTrue(pf.is_complete())
 
-        print(pf)
+        self.assertEqual(str(pf), "Goal: p v q ⊢ ~p → q\n"
+                                  "0  {0}     p v q                  A\n"
+                                  "1  {1}     ~p                     A\n"
+                                  "2  {2}     p                      A\n"
+                                  "3  {1, 2}  ~~q     1, 2[]         RAA\n"
+                                  "4  {1, 2}  q       3              ~~E\n"
+                                  "5  {3}     q                      A\n"
+                                  "6  {0, 1}  q       0, 4[2], 5[3]  vE\n"
+                                  "7  {0}     ~p → q  6[1]           →I")
+
+    def test_or_intro_1(self):
+        p = Atom("p")
+        q = Atom("q")
+        pf = Proof([p], OrExpr(q, p))
+        pls = [
+            ProofLine({0}, OrExpr(q, p), References(Reference(0)), Rule.OR_INTRO)
+        ]
+        for pl in pls:
+            self.assertTrue(pf.try_add_line(pl))
+        self.assertTrue(pf.is_complete())
+
+    def test_or_elim_1(self):
+        """
+        Discharging the disjuncts in the opposite order to the disjunction.
+        """
+        p = Atom("p")
+        q = Atom("q")
+        or_pq = OrExpr(p, q)
+        pf = Proof([or_pq], OrExpr(q, p))
+        pls = [
+            ProofLine({1}, q, References(), Rule.ASSUMPTION),
+            ProofLine({1}, OrExpr(q, p), References(Reference(1)), Rule.OR_INTRO),
+            ProofLine({2}, p, References(), Rule.ASSUMPTION),
+            ProofLine({2}, OrExpr(q, p), References(Reference(3)), Rule.OR_INTRO),
+            ProofLine({0}, OrExpr(q, p),
+                      References(Reference(0), Reference(2, 1), Reference(4, 2)),
+                      Rule.OR_ELIM)
+        ]
+        for pl in pls:
+            self.assertTrue(pf.try_add_line(pl))
+        self.assertTrue(pf.is_complete())
+
+    def test_str_1(self):
+        """
+        A references column holding only line numbers is right-aligned.
+        """
+        p = Atom("p")
+        q = Atom("q")
+        pf = Proof([NotExpr(NotExpr(p))], q)
+        pls = [ProofLine({0}, p, References(Reference(0)), Rule.DNE)]
+        for i in range(10):
+            pls.append(ProofLine({0}, p, References(Reference(i + 1)), Rule.ASSUMPTION))
+        pf.lines.extend(pls)
+        lines = str(pf).split("\n")
+        self.assertEqual(lines[1:3], [" 0  {0}  ~~p      A", " 1  {0}  p     0  ~~E"])
+        self.assertEqual(lines[-1], "11  {0}  p    10  A")
+
+    def test_preflight_1(self):
+        """
+        Lines whose references have the wrong shape for their rule are rejected.
+        """
+        p = Atom("p")
+        q = Atom("q")
+        pf = Proof([p, q], AndExpr(p, q))
+        pls = [
+            ProofLine({0, 1}, AndExpr(p, q), References(Reference(0)), Rule.AND_INTRO),
+            ProofLine({0, 1}, AndExpr(p, q), References(Reference(0), Reference(1, 0)), Rule.AND_INTRO),
+            ProofLine({0}, NotExpr(q), References(Reference(0), Reference(1)), Rule.RAA),
+            ProofLine({2}, p, References(Reference(0)), Rule.ASSUMPTION)
+        ]
+        for pl in pls:
+            self.assertFalse(pf.can_add_line(pl))
+
+    def test_preflight_2(self):
+        """
+        The per-rule methods reject lines with the wrong reference shape instead of raising.
+        """
+        p = Atom("p")
+        q = Atom("q")
+        pf = Proof([p, q, OrExpr(p, q)], q)
+        self.assertFalse(pf.can_add_and_elim(ProofLine({0}, p, References(), Rule.AND_ELIM)))
+        self.assertFalse(pf.can_add_or_elim(ProofLine({0, 1, 2}, q,
+                                                      References(Reference(2), Reference(0), Reference(1)),
+                                                      Rule.OR_ELIM)))
+        self.assertFalse(pf.can_add_raa(ProofLine({0}, NotExpr(q), References(Reference(0)), Rule.RAA)))
+
+    def test_preflight_3(self):
+        """
+        The per-rule methods reject lines whose content has the wrong outer operator instead of raising.
+        """
+        p = Atom("p")
+        q = Atom("q")
+        pf = Proof([p, q, Contr()], q)
+        self.assertFalse(pf.can_add_and_intro(ProofLine({0, 1}, p, References(Reference(0), Reference(1)),
+                                                        Rule.AND_INTRO)))
+        self.assertFalse(pf.can_add_or_intro(ProofLine({0}, p, References(Reference(0)), Rule.OR_INTRO)))
+        self.assertFalse(pf.can_add_implies_intro(ProofLine({1}, q, References(Reference(1, 0)),
+                                                            Rule.IMPLIES_INTRO)))
+        self.assertFalse(pf.can_add_not_intro(ProofLine({2}, p, References(Reference(2, "v")), Rule.NOT_INTRO)))
+
+
+class ExpressionTests(unittest.TestCase):
+    def test_hash_consing_1(self):
+        p = Atom("p")
+        q = Atom("q")
+        self.assertIs(AndExpr(p, q), AndExpr(Atom("p"), Atom("q")))
+        self.assertIs(NotExpr(ImpExpr(p, q)), NotExpr(ImpExpr(p, q)))
+        self.assertIs(Contr(), Contr())
+        self.assertIs(Atom("⊥"), Contr())
+        self.assertNotEqual(AndExpr(p, q), OrExpr(p, q))
+        self.assertNotEqual(AndExpr(p, q), AndExpr(q, p))
+
+    def test_copy_1(self):
+        """
+        Copying or pickling an expression gives back the interned expression.
+        """
+        p = Atom("p")
+        q = Atom("q")
+        exprs = [p, Contr(), NotExpr(p), AndExpr(p, q), OrExpr(NotExpr(q), Contr()), ImpExpr(AndExpr(p, q), p)]
+        for expr in exprs:
+            self.assertIs(copy.copy(expr), expr)
+            self.assertIs(copy.deepcopy(expr), expr)
+            self.assertIs(pickle.loads(pickle.dumps(expr)), expr)
+
+
+class ReferenceTests(unittest.TestCase):
+    def test_vacuous_reference_1(self):
+        self.assertEqual(Reference(3, "v").discharge, VACUOUS)
+        self.assertEqual(str(Reference(3, "v")), "3[]")
+        self.assertEqual(str(Reference(3, VACUOUS)), "3[]")
+        self.assertEqual(str(Reference(3, 0)), "3[0]")
+        with self.assertRaises(ValueError):
+            Reference(1, -2)
+
+
+class ParseTests(unittest.TestCase):
+    def test_parse_1(self):
+        p = Atom("p")
+        q = Atom("q")
+        r = Atom("r")
+        expected = AndExpr(NotExpr(OrExpr(p, q)), ImpExpr(r, NotExpr(p)))
+        self.assertIs(parseExpr("~(pvq)^(r→~p)"), expected)
+        self.assertIs(parseExpr("~(p v q) ^ (r -> ~p)"), expected)
+        self.assertIs(parseExpr("~(p v q) ^ (r --> ~p)"), expected)
+
 
 if __name__ == '__main__':
     #x = CanAddTests()